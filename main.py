@@ -10,15 +10,38 @@ Features:
 - Dark mode immersive accordion UI
 """
 
+import io
 import os
 import sys
 import re
+import asyncio
+import hashlib
 import logging
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import cached_property, partial
+from html import escape, unescape
 from pathlib import Path
-from typing import List, Dict, Optional
+from urllib.parse import urlsplit
+from typing import Callable, List, Dict, Optional, Set, TextIO, Tuple
 import feedparser
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from lxml import etree
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+try:
+    import aiohttp
+except ImportError:  # fetch_feeds falls back to a thread pool
+    aiohttp = None
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +49,861 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+_BANNER = "=" * 70
+
+# Gemini failures worth retrying: overload, server hiccups, rate limiting
+# and response streams that went silent
+_TRANSIENT_GEMINI_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    asyncio.TimeoutError,
+)
+
+# Feed summary cleanup patterns, compiled once at import
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_BOILERPLATE_RE = re.compile(
+    # WordPress footer: only from the last "The post", which may also open real prose
+    r'(?:\s*The post\b(?:(?!\bThe post\b).)*\bappeared first on\b.*'
+    r'|\s*\[(?:\.\.\.|…)\]'
+    r'|(?:^|(?<=[.!?…]))\s*(?:Click here to read more|Continue reading|Read more)\W*)$',
+    re.IGNORECASE
+)
+_NON_WORD_RE = re.compile(r'\W+')
+
+# Archive pages are named YYYY-MM-DD.html
+_ARCHIVE_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Stylesheet minification patterns
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+# Space before ':' is kept, since `.a :hover` and `.a:hover` differ
+_CSS_PUNCT_RE = re.compile(r'(?:\s*([{};,>])|(:))\s*')
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+
+
+def _first_text(node, *tags: str) -> str:
+    """Return the first non-empty child text among `tags`"""
+    for tag in tags:
+        text = node.findtext(tag)
+        if text and text.strip():
+            return text.strip()
+    return ""
+
+
+def parse_feed_entries(body: bytes, limit: int) -> List[Dict[str, str]]:
+    """Extract the first `limit` RSS items or Atom entries from a feed body
+    
+    Streams the document and only reads the fields the pipeline uses (title,
+    link, published, summary), stopping as soon as enough entries are
+    collected. Raises etree.XMLSyntaxError on malformed XML.
+    """
+    # Entity expansion and network access stay off for untrusted feeds
+    context = etree.iterparse(
+        io.BytesIO(body),
+        events=("end",),
+        tag=("{*}item", "{*}entry"),
+        resolve_entities=False,
+        no_network=True
+    )
+    entries = []
+    
+    for _, node in context:
+        link = _first_text(node, "{*}link")
+        if not link:
+            # Atom carries the link in an attribute
+            for link_node in node.iterfind("{*}link"):
+                if link_node.get("rel", "alternate") == "alternate":
+                    link = link_node.get("href", "")
+                    break
+        
+        fields = {
+            "title": _first_text(node, "{*}title"),
+            "link": link,
+            "published": _first_text(node, "{*}pubDate", "{*}published", "{*}updated", "{*}date"),
+            "summary": _first_text(node, "{*}description", "{*}summary", "{*}content"),
+        }
+        entries.append({key: value for key, value in fields.items() if value})
+        
+        if len(entries) >= limit:
+            break
+        
+        # Drop finished entries so memory stays bounded to one of them
+        node.clear()
+        while node.getprevious() is not None:
+            del node.getparent()[0]
+    
+    return entries
+
+
+def clean_summary(raw: str, limit: int = 500) -> str:
+    """Reduce an RSS summary to plain prose to keep Gemini prompts small"""
+    # Entities are decoded after tag stripping so an escaped "&lt;b&gt;" stays text
+    text = _WS_RE.sub(' ', unescape(_TAG_RE.sub(' ', raw))).strip()
+    return _BOILERPLATE_RE.sub('', text)[:limit]
+
+
+def story_keys(title: str, link: str) -> Set[str]:
+    """Keys under which two articles count as the same story
+    
+    Syndicated copies tend to share either the opening of the title (case,
+    spacing and punctuation ignored) or the article URL. The URL key keeps the
+    query, which identifies the story on some sites, minus utm_* tracking.
+    """
+    keys = set()
+    normalized = _NON_WORD_RE.sub('', title.lower())[:40]
+    if normalized:
+        keys.add(normalized)
+    url = urlsplit(link)
+    if url.netloc:
+        query = "&".join(
+            param for param in url.query.split("&")
+            if param and not param.lower().startswith("utm_")
+        )
+        keys.add(url.netloc.lower() + url.path.rstrip('/') + (f"?{query}" if query else ""))
+    return keys
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and layout whitespace from a stylesheet"""
+    css = _WS_RE.sub(' ', _CSS_COMMENT_RE.sub('', css))
+    return _CSS_PUNCT_RE.sub(r'\1\2', css).replace(';}', '}').strip()
+
+
+def minify_markup(markup: str) -> str:
+    """Drop indentation, blank lines and comment lines from an HTML/inline-JS template
+    
+    Line breaks are kept so inline scripts still rely on automatic semicolon insertion.
+    """
+    lines = (line.strip() for line in _HTML_COMMENT_RE.sub('', markup).splitlines())
+    return "".join(line + "\n" for line in lines if line and not line.startswith('//'))
+
+
+# Page stylesheet, written once to its own file so browsers cache it across days
+_CSS = """* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+:root {
+    --bg-primary: #0a0a0f;
+    --bg-secondary: #12121a;
+    --bg-card: #1a1a24;
+    --bg-card-hover: #222230;
+    --text-primary: #f0f0f5;
+    --text-secondary: #a0a0b0;
+    --text-muted: #606070;
+    --border-color: #2a2a3a;
+    --accent-blue: #3498db;
+    --accent-red: #e74c3c;
+    --accent-green: #27ae60;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, "SF Pro Display", "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+    background: var(--bg-primary);
+    color: var(--text-primary);
+    line-height: 1.7;
+    min-height: 100vh;
+}
+
+/* Navigation Bar */
+.navbar {
+    position: sticky;
+    top: 0;
+    z-index: 1000;
+    background: rgba(10, 10, 15, 0.95);
+    backdrop-filter: blur(10px);
+    border-bottom: 1px solid var(--border-color);
+    padding: 12px 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+
+.navbar-brand {
+    font-size: 1.2em;
+    font-weight: 600;
+    color: var(--text-primary);
+    text-decoration: none;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+}
+
+.navbar-brand:hover {
+    color: var(--accent-blue);
+}
+
+/* History Dropdown */
+.history-dropdown {
+    position: relative;
+}
+
+.history-btn {
+    background: var(--bg-card);
+    border: 1px solid var(--border-color);
+    color: var(--text-secondary);
+    padding: 8px 16px;
+    border-radius: 8px;
+    cursor: pointer;
+    font-size: 0.9em;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    transition: all 0.2s;
+}
+
+.history-btn:hover {
+    background: var(--bg-card-hover);
+    color: var(--text-primary);
+}
+
+.history-btn svg {
+    width: 16px;
+    height: 16px;
+    fill: currentColor;
+    transition: transform 0.2s;
+}
+
+.history-dropdown.open .history-btn svg {
+    transform: rotate(180deg);
+}
+
+.history-menu {
+    position: absolute;
+    top: calc(100% + 8px);
+    right: 0;
+    background: var(--bg-card);
+    border: 1px solid var(--border-color);
+    border-radius: 12px;
+    min-width: 200px;
+    max-height: 400px;
+    overflow-y: auto;
+    display: none;
+    box-shadow: 0 10px 40px rgba(0, 0, 0, 0.5);
+}
+
+.history-dropdown.open .history-menu {
+    display: block;
+}
+
+.history-menu-header {
+    padding: 12px 16px;
+    border-bottom: 1px solid var(--border-color);
+    font-size: 0.8em;
+    color: var(--text-muted);
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+
+.history-item {
+    display: block;
+    padding: 10px 16px;
+    color: var(--text-secondary);
+    text-decoration: none;
+    font-size: 0.9em;
+    transition: all 0.2s;
+    border-bottom: 1px solid var(--border-color);
+}
+
+.history-item:last-child {
+    border-bottom: none;
+}
+
+.history-item:hover {
+    background: var(--bg-card-hover);
+    color: var(--text-primary);
+}
+
+.history-item.current {
+    color: var(--accent-blue);
+    font-weight: 600;
+}
+
+.container {
+    max-width: 900px;
+    margin: 0 auto;
+    padding: 20px;
+}
+
+/* Header */
+.header {
+    text-align: center;
+    padding: 60px 20px;
+    background: linear-gradient(180deg, var(--bg-secondary) 0%, var(--bg-primary) 100%);
+    border-bottom: 1px solid var(--border-color);
+    margin-bottom: 40px;
+}
+
+.header h1 {
+    font-size: 2.8em;
+    font-weight: 700;
+    margin-bottom: 12px;
+    background: linear-gradient(135deg, #fff 0%, #a0a0b0 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    background-clip: text;
+}
+
+.header .subtitle {
+    font-size: 1.1em;
+    color: var(--text-secondary);
+    margin-bottom: 20px;
+}
+
+.header .timestamp {
+    font-size: 0.9em;
+    color: var(--text-muted);
+    padding: 8px 16px;
+    background: var(--bg-card);
+    border-radius: 20px;
+    display: inline-block;
+}
+
+.header .vietnam-badge {
+    display: inline-block;
+    margin-top: 15px;
+    padding: 6px 14px;
+    background: linear-gradient(135deg, var(--accent-green) 0%, #1e8449 100%);
+    color: white;
+    border-radius: 20px;
+    font-size: 0.85em;
+    font-weight: 600;
+}
+
+/* Category Section */
+.category {
+    margin-bottom: 50px;
+}
+
+.category-header {
+    display: flex;
+    align-items: center;
+    gap: 15px;
+    margin-bottom: 25px;
+    padding-bottom: 15px;
+    border-bottom: 2px solid var(--border-color);
+}
+
+.category-icon {
+    font-size: 1.8em;
+}
+
+.category-title {
+    font-size: 1.6em;
+    font-weight: 600;
+    color: var(--text-primary);
+}
+
+.category-subtitle {
+    font-size: 0.9em;
+    color: var(--text-muted);
+    margin-left: auto;
+}
+
+.category-count {
+    background: var(--accent-color);
+    color: white;
+    padding: 2px 10px;
+    border-radius: 12px;
+    font-size: 0.8em;
+    font-weight: 600;
+}
+
+/* Article Card - Accordion */
+.article {
+    background: var(--bg-card);
+    border: 1px solid var(--border-color);
+    border-radius: 12px;
+    margin-bottom: 16px;
+    overflow: hidden;
+    transition: all 0.3s ease;
+}
+
+.article:hover {
+    background: var(--bg-card-hover);
+    border-color: #3a3a4a;
+}
+
+.article-header {
+    padding: 20px 24px;
+    cursor: pointer;
+    display: flex;
+    align-items: flex-start;
+    gap: 16px;
+    user-select: none;
+}
+
+.article-header:hover {
+    background: rgba(255, 255, 255, 0.02);
+}
+
+.article-indicator {
+    width: 4px;
+    height: 4px;
+    background: var(--accent-color);
+    border-radius: 50%;
+    margin-top: 10px;
+    flex-shrink: 0;
+}
+
+.article-main {
+    flex: 1;
+}
+
+.article-source {
+    font-size: 0.75em;
+    color: var(--text-muted);
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+    margin-bottom: 8px;
+}
+
+.article-title {
+    font-size: 1.15em;
+    font-weight: 600;
+    color: var(--text-primary);
+    line-height: 1.5;
+    margin-bottom: 8px;
+}
+
+.article-meta {
+    font-size: 0.85em;
+    color: var(--text-muted);
+}
+
+.article-toggle {
+    width: 32px;
+    height: 32px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    background: var(--bg-secondary);
+    border-radius: 8px;
+    flex-shrink: 0;
+    transition: transform 0.3s ease;
+}
+
+.article-toggle svg {
+    width: 16px;
+    height: 16px;
+    fill: var(--text-muted);
+    transition: transform 0.3s ease;
+}
+
+.article.expanded .article-toggle svg {
+    transform: rotate(180deg);
+}
+
+/* Article Content - Expandable */
+.article-content {
+    max-height: 0;
+    overflow: hidden;
+    transition: max-height 0.4s ease-out;
+}
+
+.article.expanded .article-content {
+    max-height: 2000px;
+    transition: max-height 0.6s ease-in;
+}
+
+.article-body {
+    padding: 0 24px 24px 44px;
+    border-top: 1px solid var(--border-color);
+}
+
+.analysis-section {
+    padding-top: 20px;
+}
+
+.analysis-label {
+    font-size: 0.8em;
+    color: var(--accent-color);
+    text-transform: uppercase;
+    letter-spacing: 1px;
+    margin-bottom: 12px;
+    display: flex;
+    align-items: center;
+    gap: 8px;
+}
+
+.analysis-label::before {
+    content: "";
+    width: 20px;
+    height: 2px;
+    background: var(--accent-color);
+}
+
+.analysis-text {
+    font-size: 1em;
+    color: var(--text-secondary);
+    line-height: 1.9;
+    white-space: pre-wrap;
+}
+
+.source-link {
+    margin-top: 20px;
+    padding-top: 16px;
+    border-top: 1px dashed var(--border-color);
+}
+
+.source-link a {
+    font-size: 0.8em;
+    color: var(--text-muted);
+    text-decoration: none;
+    display: inline-flex;
+    align-items: center;
+    gap: 6px;
+    transition: color 0.2s;
+}
+
+.source-link a:hover {
+    color: var(--accent-blue);
+}
+
+.source-link a svg {
+    width: 12px;
+    height: 12px;
+    fill: currentColor;
+}
+
+/* Footer */
+.footer {
+    text-align: center;
+    padding: 40px 20px;
+    border-top: 1px solid var(--border-color);
+    margin-top: 60px;
+}
+
+.footer p {
+    font-size: 0.85em;
+    color: var(--text-muted);
+    margin-bottom: 8px;
+}
+
+.footer .powered {
+    font-size: 0.75em;
+    color: var(--text-muted);
+    opacity: 0.7;
+}
+
+/* Responsive */
+@media (max-width: 768px) {
+    .navbar {
+        padding: 10px 15px;
+    }
+    
+    .navbar-brand {
+        font-size: 1em;
+    }
+    
+    .container {
+        padding: 15px;
+    }
+    
+    .header {
+        padding: 40px 15px;
+    }
+    
+    .header h1 {
+        font-size: 2em;
+    }
+    
+    .category-header {
+        flex-wrap: wrap;
+    }
+    
+    .category-subtitle {
+        width: 100%;
+        margin-left: 0;
+        margin-top: 8px;
+    }
+    
+    .article-header {
+        padding: 16px;
+    }
+    
+    .article-body {
+        padding: 0 16px 20px 16px;
+    }
+    
+    .article-title {
+        font-size: 1.05em;
+    }
+    
+    .history-menu {
+        right: -10px;
+        min-width: 180px;
+    }
+}
+
+/* Category-specific accent colors */
+.category-china-us { --accent-color: var(--accent-red); }
+.category-vietnam { --accent-color: var(--accent-green); }
+.category-global { --accent-color: var(--accent-blue); }
+
+/* Scrollbar styling */
+.history-menu::-webkit-scrollbar {
+    width: 6px;
+}
+
+.history-menu::-webkit-scrollbar-track {
+    background: var(--bg-secondary);
+}
+
+.history-menu::-webkit-scrollbar-thumb {
+    background: var(--border-color);
+    border-radius: 3px;
+}
+"""
+
+# Static page skeleton, _HTML_HEAD is filled via str.format
+_HTML_HEAD = minify_markup("""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>每日深度研报 | Daily Deep Analysis</title>
+    <link rel="stylesheet" href="{stylesheet}">
+</head>
+<body>
+    <!-- Navigation Bar with History Dropdown -->
+    <nav class="navbar">
+        <a href="{home_link}" class="navbar-brand">
+            📊 每日深度研报
+        </a>
+        <div class="history-dropdown" id="historyDropdown">
+            <button class="history-btn" onclick="toggleHistory()">
+                📅 往期回顾
+                <svg viewBox="0 0 24 24"><path d="M7.41 8.59L12 13.17l4.59-4.58L18 10l-6 6-6-6 1.41-1.41z"/></svg>
+            </button>
+            <div class="history-menu">
+                <div class="history-menu-header">Historical Archives</div>
+                {history_items}
+            </div>
+        </div>
+    </nav>
+    
+    <header class="header">
+        <h1>📊 每日深度研报</h1>
+        <p class="subtitle">AI-Powered Macro Analysis · 首席分析师视角</p>
+        <span class="timestamp">🕐 更新时间: {current_time}</span>
+        <div><span class="vietnam-badge">🇻🇳 越南深度版 V3.0</span></div>
+    </header>
+    
+    <main class="container">
+""")
+
+# History dropdown entries, filled via str.format
+_HISTORY_ITEM_HTML = '<a href="{prefix}{path}" class="history-item">{display}</a>\n'
+_HISTORY_TODAY_HTML = '<a href="{prefix}index.html" class="history-item current">{display} (今日)</a>\n'
+
+# Per-section and per-article fragments, filled via str.format
+_CATEGORY_OPEN_HTML = minify_markup("""
+        <section class="category {cat_class}">
+            <div class="category-header">
+                <span class="category-icon">{icon}</span>
+                <h2 class="category-title">{category}</h2>
+                <span class="category-count">{count} 篇</span>
+                <span class="category-subtitle">{subtitle}</span>
+            </div>
+""")
+
+_CATEGORY_CLOSE_HTML = minify_markup("""
+        </section>
+""")
+
+_ARTICLE_HTML = minify_markup("""
+            <article class="article" data-id="{article_id}">
+                <div class="article-header" onclick="toggleArticle(this)">
+                    <div class="article-indicator"></div>
+                    <div class="article-main">
+                        <div class="article-source">{source}</div>
+                        <h3 class="article-title">{title}</h3>
+                        <div class="article-meta">{published}</div>
+                    </div>
+                    <div class="article-toggle">
+                        <svg viewBox="0 0 24 24"><path d="M7.41 8.59L12 13.17l4.59-4.58L18 10l-6 6-6-6 1.41-1.41z"/></svg>
+                    </div>
+                </div>
+                <div class="article-content">
+                    <div class="article-body">
+                        <div class="analysis-section">
+                            <div class="analysis-label">深度分析 Deep Analysis</div>
+                            <div class="analysis-text">{analysis}</div>
+                        </div>
+                        <div class="source-link">
+                            <a href="{link}" target="_blank" rel="noopener noreferrer">
+                                <svg viewBox="0 0 24 24"><path d="M19 19H5V5h7V3H5c-1.11 0-2 .9-2 2v14c0 1.1.89 2 2 2h14c1.1 0 2-.9 2-2v-7h-2v7zM14 3v2h3.59l-9.83 9.83 1.41 1.41L19 6.41V10h2V3h-7z"/></svg>
+                                Source Link · 原文链接
+                            </a>
+                        </div>
+                    </div>
+                </div>
+            </article>
+""")
+
+_HTML_TAIL = minify_markup("""
+    </main>
+    
+    <footer class="footer">
+        <p>🤖 由 Google Gemini AI 深度分析驱动</p>
+        <p class="powered">Automated by GitHub Actions · Hosted on GitHub Pages</p>
+        <p class="powered">V3.0 Historical Archives Edition</p>
+    </footer>
+    
+    <script>
+        // Count open cards so Escape can skip the DOM scan when none are open
+        let expandedCount = 0;
+        
+        function toggleArticle(header) {
+            const article = header.closest('.article');
+            const expanded = article.classList.toggle('expanded');
+            expandedCount += expanded ? 1 : -1;
+            
+            if (expanded) {
+                setTimeout(() => {
+                    article.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+                }, 100);
+            }
+        }
+        
+        // The outside-click listener only exists while the dropdown is open
+        function closeHistory() {
+            document.getElementById('historyDropdown').classList.remove('open');
+            document.removeEventListener('click', closeHistoryOnOutsideClick, true);
+        }
+        
+        function closeHistoryOnOutsideClick(e) {
+            if (!document.getElementById('historyDropdown').contains(e.target)) {
+                closeHistory();
+            }
+        }
+        
+        function toggleHistory() {
+            const dropdown = document.getElementById('historyDropdown');
+            if (dropdown.classList.contains('open')) {
+                closeHistory();
+            } else {
+                dropdown.classList.add('open');
+                document.addEventListener('click', closeHistoryOnOutsideClick, true);
+            }
+        }
+        
+        // Keyboard navigation
+        document.addEventListener('keydown', (e) => {
+            if (e.key !== 'Escape') {
+                return;
+            }
+            if (expandedCount) {
+                document.querySelectorAll('.article.expanded').forEach(a => {
+                    a.classList.remove('expanded');
+                });
+                expandedCount = 0;
+            }
+            closeHistory();
+        });
+    </script>
+</body>
+</html>""")
+
+
+def _js_template(template: str, obj: str) -> str:
+    """Turn a str.format fragment into a JS template literal over `obj`'s escaped fields"""
+    return "`" + re.sub(r'\{(\w+)\}', r'${esc(%s.\1)}' % obj, template) + "`"
+
+
+# Client-side renderer for JSON archives, reusing the server-side fragments
+_VIEWER_SCRIPT = minify_markup("""
+        <div id="archiveView"></div>
+        <script>
+            (function () {
+                const view = document.getElementById('archiveView');
+                const date = new URLSearchParams(location.search).get('date') || '';
+                const esc = (s) => String(s).replace(/[&<>"']/g, (c) => ({
+                    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+                })[c]);
+                const missing = () => { view.textContent = '未找到该日期的研报 · Archive not found'; };
+                
+                if (!/^\\d{4}-\\d{2}-\\d{2}$/.test(date)) {
+                    missing();
+                    return;
+                }
+                
+                fetch('archives/' + date + '.json')
+                    .then((resp) => {
+                        if (!resp.ok) throw new Error(resp.status);
+                        return resp.json();
+                    })
+                    .then((data) => {
+                        document.title = date + ' | 每日深度研报';
+                        document.querySelector('.timestamp').textContent = '🕐 更新时间: ' + data.generated_at;
+                        view.innerHTML = data.categories.map((c) =>
+                            __CATEGORY_OPEN__ +
+                            c.articles.map((a) => __ARTICLE__).join('') +
+                            __CATEGORY_CLOSE__
+                        ).join('');
+                    })
+                    .catch(missing);
+            })();
+        </script>
+""").replace("__CATEGORY_OPEN__", _js_template(_CATEGORY_OPEN_HTML, "c")).replace(
+    "__ARTICLE__", _js_template(_ARTICLE_HTML, "a")).replace(
+    "__CATEGORY_CLOSE__", _js_template(_CATEGORY_CLOSE_HTML, "c"))
+
+
+@dataclass(slots=True)
+class Article:
+    """One news item as it moves from feed to rendered card"""
+    source: str
+    title: str
+    link: str
+    published: str
+    summary: str
+    deep_analysis: str = ""
+
+
+class SummaryCache:
+    """SQLite store of Gemini analyses keyed by article content"""
+    
+    # Feeds repeat items for a few days; older analyses are dropped
+    MAX_AGE = 7 * 24 * 3600
+    
+    def __init__(self, path: Path, version: str = "", max_age: int = MAX_AGE):
+        self.conn = sqlite3.connect(path)
+        self.version = version
+        self.max_age = max_age
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses "
+            "(key TEXT PRIMARY KEY, analysis TEXT NOT NULL, ts INTEGER NOT NULL)"
+        )
+        self.conn.execute("DELETE FROM analyses WHERE ts < ?", (self._cutoff(),))
+    
+    def _cutoff(self) -> int:
+        return int(time.time()) - self.max_age
+    
+    def key(self, article: Article) -> str:
+        """Identify an article by the prompt version and the fields it fills in"""
+        material = "|".join((self.version, article.source, article.title, article.summary))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def get(self, article: Article) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT analysis FROM analyses WHERE key = ? AND ts >= ?",
+            (self.key(article), self._cutoff())
+        ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, article: Article, analysis: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO analyses (key, analysis, ts) VALUES (?, ?, ?)",
+            (self.key(article), analysis, int(time.time()))
+        )
+    
+    def commit(self) -> None:
+        self.conn.commit()
 
 
 class NewsAggregatorV3:
@@ -69,16 +947,19 @@ class NewsAggregatorV3:
         }
     }
     
-    # Deep Analysis Prompt Template
-    ANALYST_PROMPT = """你是一位拥有20年经验的首席宏观经济分析师，曾任职于高盛、摩根士丹利等顶级投行。
-
-请根据以下新闻信息，撰写一篇200-300字的深度研报摘要。
+    # Section header icon, subtitle and accent class for each FEED_SOURCES category
+    CATEGORY_CONFIG = {
+        "中美政经": {"icon": "🇺🇸🇨🇳", "subtitle": "China & US Policy", "css_class": "category-china-us"},
+        "越南市场": {"icon": "🇻🇳", "subtitle": "Vietnam Business · Deep Dive", "css_class": "category-vietnam"},
+        "全球宏观": {"icon": "🌍", "subtitle": "Global & EU/East Asia", "css_class": "category-global"},
+    }
+    
+    # Deep Analysis instructions, passed to the model as its system instruction
+    ANALYST_INSTRUCTION = """你是一位拥有20年经验的首席宏观经济分析师，曾任职于高盛、摩根士丹利等顶级投行。
 
-【新闻来源】{source}
-【新闻标题】{title}
-【原文摘要】{summary}
+请根据用户提供的新闻信息，为每条新闻撰写一篇200-300字的深度研报摘要。
 
-你的研报必须包含以下三个部分，请用清晰的段落分隔：
+每篇研报必须包含以下三个部分，请用清晰的段落分隔：
 
 📌 核心事实：
 用2-3句话精准概括新闻的核心内容，提炼关键数据和事件。
@@ -89,79 +970,448 @@ class NewsAggregatorV3:
 ⚠️ 潜在风险：
 指出投资者和决策者需要警惕的风险因素，包括政策不确定性、市场波动、地缘政治风险等。
 
-请直接输出研报内容，使用中文，语言专业但易于理解。不要添加任何开场白或结束语。"""
+研报使用中文，语言专业但易于理解。不要添加任何开场白或结束语。"""
 
-    def __init__(self):
-        """Initialize the V3.0 news aggregator with Gemini API"""
+    # Per-call prompts only carry the news itself
+    ANALYST_PROMPT = """【新闻来源】{source}
+【新闻标题】{title}
+【原文摘要】{summary}
+
+请直接输出研报内容。"""
+
+    # Batch variant: one call analyzes every article of a category
+    BATCH_ANALYST_PROMPT = """以下共{count}条新闻，请为每一条分别撰写研报。
+
+{news_items}
+
+请以JSON数组输出，每条新闻对应一个对象：[{{"idx": 新闻编号, "analysis": "研报内容"}}]"""
+
+    BATCH_ITEM_TEMPLATE = """[{idx}]
+【新闻来源】{source}
+【新闻标题】{title}
+【原文摘要】{summary}"""
+
+    BATCH_GENERATION_CONFIG = {"response_mime_type": "application/json", "temperature": 0}
+    
+    # Articles per batch call: large categories are split so each response
+    # stays short enough to come back whole, and the chunks run in parallel
+    BATCH_SIZE = 6
+    
+    MODEL_NAME = "gemini-2.5-flash"
+    
+    # How long a cached analysis may be reused (seconds)
+    ANALYSIS_CACHE_TTL = SummaryCache.MAX_AGE
+    
+    # Upper bound on in-flight Gemini requests, keeps us clear of 429s
+    GEMINI_CONCURRENCY = 8
+    
+    # Hedging targets real stragglers only. gemini-2.5-flash routinely thinks
+    # for 15s+ before its first chunk, longer for batches, so a duplicate is
+    # raced only once a call has gone HEDGE_LATENCY_FACTOR times the median
+    # first-chunk latency seen this run without output, and never before the
+    # floors below (seconds, per kind of call)
+    HEDGE_AFTER = {"single": 45, "batch": 90}
+    HEDGE_LATENCY_FACTOR = 3
+    
+    # Seconds to wait for the first streamed chunk; gemini-2.5-flash sends
+    # nothing until its thinking phase ends, which is slow for full batches
+    GEMINI_FIRST_CHUNK_TIMEOUT = 120
+    
+    # Seconds of silence between streamed chunks before a response is abandoned
+    GEMINI_STALL_TIMEOUT = 15
+    
+    # Summaries are tag-stripped and every field is escaped at render time, so
+    # feedparser's HTML sanitizer and relative-URI rewriting are wasted work
+    FEEDPARSER_OPTIONS = {"sanitize_html": False, "resolve_relative_uris": False}
+    
+    # Worker threads for the blocking fallback fetch path
+    FEED_FETCH_WORKERS = 8
+    
+    # Per-feed time limits (seconds) so one slow server can't hold up the run
+    FEED_CONNECT_TIMEOUT = 3
+    FEED_READ_TIMEOUT = 8
+    FEED_TOTAL_TIMEOUT = 15
+    
+    # Explicitly negotiate compressed feed bodies on both fetch paths
+    FEED_REQUEST_HEADERS = {
+        "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8",
+        "Accept-Encoding": "gzip, deflate",
+    }
+    
+    # Entry fields kept in the feed cache so a 304 can be served locally
+    CACHED_ENTRY_FIELDS = ("title", "link", "published", "updated", "summary")
+    
+    # Shared stylesheet, published next to index.html
+    STYLESHEET_FILE = Path("styles.css")
+    
+    # Archives are stored as JSON and rendered by VIEWER_FILE in the browser.
+    # Full static HTML archives are still written during the transition.
+    VIEWER_FILE = Path("viewer.html")
+    WRITE_HTML_ARCHIVES = True
+
+    @classmethod
+    def validate_env(cls) -> str:
+        """Return the Gemini API key, raising ValueError if it is not configured"""
         api_key = os.environ.get("GEMINI_API_KEY")
         if not api_key:
             raise ValueError(
                 "GEMINI_API_KEY environment variable not set. "
                 "Please set it before running this script."
             )
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+        return api_key
+    
+    def __init__(self):
+        """Initialize the V3.0 news aggregator with Gemini API"""
+        genai.configure(api_key=self.validate_env())
+        self.model = genai.GenerativeModel(
+            self.MODEL_NAME,
+            system_instruction=self.ANALYST_INSTRUCTION
+        )
         self.news_data = {}
         self.archives_dir = Path("archives")
+        self._archives = None
         self.today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         
         # Ensure archives directory exists
         self.archives_dir.mkdir(exist_ok=True)
         
+        # First-chunk latencies observed this run, per kind of Gemini call
+        self.first_chunk_latency = {kind: [] for kind in self.HEDGE_AFTER}
+        
+        # Persistent caches (restored between CI runs by the workflow)
+        self.cache_dir = Path(".cache")
+        self.cache_dir.mkdir(exist_ok=True)
+        self.feed_cache_file = self.cache_dir / "feeds.json"
+        self.feed_cache = self._load_feed_cache()
+        self.summary_cache = SummaryCache(
+            self.cache_dir / "summaries.sqlite",
+            version=self._prompt_version,
+            max_age=self.ANALYSIS_CACHE_TTL
+        )
+        
         logger.info("NewsAggregatorV3 initialized successfully")
     
-    def fetch_feeds(self) -> None:
-        """Fetch and parse RSS feeds from all sources"""
-        logger.info("Starting RSS feed fetching...")
-        
-        for category, config in self.FEED_SOURCES.items():
-            self.news_data[category] = []
-            sources = config["sources"]
-            limit = config["limit"]
-            articles_per_source = max(2, limit // len(sources) + 1)
+    def _load_feed_cache(self) -> Dict[str, Dict]:
+        """Load ETag/Last-Modified validators and entries from the last run"""
+        try:
+            return orjson.loads(self.feed_cache_file.read_bytes())
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_feed_cache(self) -> None:
+        """Persist feed validators and entries for the next run"""
+        self.feed_cache_file.write_bytes(orjson.dumps(self.feed_cache))
+    
+    def _feedparser_entries(self, feed, limit: int) -> List[Dict[str, str]]:
+        """Reduce a feedparser result to the first `limit` plain entry dicts"""
+        if feed.bozo and not feed.entries:
+            raise feed.bozo_exception
+        
+        return [
+            {key: entry[key] for key in self.CACHED_ENTRY_FIELDS if key in entry}
+            for entry in feed.entries[:limit]
+        ]
+    
+    def _remember_feed(self, url: str, entries: List[Dict], etag: Optional[str], modified: Optional[str]) -> None:
+        """Record a freshly downloaded feed so it can be revalidated next run"""
+        if entries:
+            self.feed_cache[url] = {"etag": etag, "modified": modified, "entries": entries}
+    
+    def _cached_feed(self, url: str) -> List[Dict[str, str]]:
+        """Return the cached entries of a feed after a 304 Not Modified"""
+        logger.debug("  Not modified, reusing cached entries: %s", url)
+        return self.feed_cache[url]["entries"]
+    
+    def _parse_body(self, url: str, body: bytes, content_type: Optional[str], limit: int) -> List[Dict[str, str]]:
+        """Parse a downloaded feed body, falling back to feedparser on bad XML"""
+        try:
+            return parse_feed_entries(body, limit)
+        except etree.XMLSyntaxError:
+            # Malformed XML: let feedparser's lenient parser have a go, handing
+            # over the declared charset and URL so relative links resolve
+            feed = feedparser.parse(
+                body,
+                response_headers={
+                    "content-type": content_type or "application/xml",
+                    "content-location": url,
+                },
+                **self.FEEDPARSER_OPTIONS
+            )
+            return self._feedparser_entries(feed, limit)
+    
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validators from the last fetch; unchanged feeds answer 304 with no body"""
+        cached = self.feed_cache.get(url, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+        return headers
+    
+    def _feed_session(self) -> "aiohttp.ClientSession":
+        """Shared HTTP session for concurrent feed downloads"""
+        return aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(
+                total=self.FEED_TOTAL_TIMEOUT,
+                sock_connect=self.FEED_CONNECT_TIMEOUT,
+                sock_read=self.FEED_READ_TIMEOUT
+            ),
+            headers=self.FEED_REQUEST_HEADERS,
+            # Pooled keep-alive connections, DNS answers reused across feeds;
+            # at most 4 at a time per host so shared CDNs aren't hammered
+            connector=aiohttp.TCPConnector(limit=16, limit_per_host=4, ttl_dns_cache=300)
+        )
+    
+    async def _fetch_feed(self, session: "aiohttp.ClientSession", url: str, limit: int) -> List[Dict[str, str]]:
+        """Conditionally fetch one feed and parse its first `limit` entries"""
+        async with session.get(url, headers=self._conditional_headers(url)) as resp:
+            if resp.status == 304:
+                return self._cached_feed(url)
             
-            logger.info(f"Category: {category} (target: {limit} articles, ~{articles_per_source} per source)")
+            resp.raise_for_status()
+            body = await resp.read()
             
-            for source in sources:
-                try:
-                    logger.info(f"  Fetching {source['name']}...")
-                    feed = feedparser.parse(source['url'])
+            # Parse off the event loop so other downloads and Gemini calls keep flowing
+            entries = await asyncio.to_thread(
+                self._parse_body, url, body, resp.headers.get("Content-Type"), limit
+            )
+            
+            self._remember_feed(url, entries, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+            return entries
+    
+    def _requests_session(self) -> requests.Session:
+        """Keep-alive session shared by the fetch worker threads"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.FEED_FETCH_WORKERS, pool_maxsize=self.FEED_FETCH_WORKERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.FEED_REQUEST_HEADERS)
+        return session
+    
+    def _fetch_one(self, session: requests.Session, url: str, limit: int):
+        """Blocking conditional fetch of a single feed"""
+        try:
+            # feedparser's own fetcher has no timeout, so download with requests
+            resp = session.get(
+                url,
+                headers=self._conditional_headers(url),
+                timeout=(self.FEED_CONNECT_TIMEOUT, self.FEED_READ_TIMEOUT)
+            )
+            if resp.status_code == 304:
+                return self._cached_feed(url)
+            
+            resp.raise_for_status()
+            entries = self._parse_body(url, resp.content, resp.headers.get("Content-Type"), limit)
+            self._remember_feed(url, entries, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+            return entries
+        
+        except Exception as e:
+            # Mirror asyncio.gather(return_exceptions=True)
+            return e
+    
+    def _fetch_parsed(self, limits: Dict[str, int]) -> Dict[str, object]:
+        """Fetch and parse all feeds on a thread pool, keyed by URL
+        
+        This is the fallback when aiohttp is missing; with it, run() fetches
+        inside _fetch_and_analyze instead. `limits` maps each feed URL to the
+        number of entries wanted from it. Values are lists of entry dicts, or
+        the exception that sank the feed.
+        """
+        # Blocking fetches release the GIL on socket reads,
+        # so threads still overlap the network waits
+        with self._requests_session() as session, \
+                ThreadPoolExecutor(max_workers=min(self.FEED_FETCH_WORKERS, len(limits))) as executor:
+            results = list(executor.map(partial(self._fetch_one, session), limits.keys(), limits.values()))
+        
+        self._save_feed_cache()
+        return dict(zip(limits, results))
+    
+    @cached_property
+    def _prompt_version(self) -> str:
+        """Fingerprint of the model and prompts; editing either retires cached analyses"""
+        material = "\0".join((
+            self.MODEL_NAME,
+            self.ANALYST_INSTRUCTION,
+            self.ANALYST_PROMPT,
+            self.BATCH_ANALYST_PROMPT,
+            self.BATCH_ITEM_TEMPLATE,
+        ))
+        return hashlib.sha1(material.encode('utf-8')).hexdigest()[:12]
+    
+    @cached_property
+    def _flat_sources(self) -> List[Tuple[str, str, str]]:
+        """FEED_SOURCES flattened once into (category, name, url) tuples"""
+        return [
+            (category, source['name'], source['url'])
+            for category, config in self.FEED_SOURCES.items()
+            for source in config["sources"]
+        ]
+    
+    @cached_property
+    def _per_source(self) -> Dict[str, int]:
+        """Number of articles to take from each source, per category"""
+        return {
+            category: max(2, config["limit"] // len(config["sources"]) + 1)
+            for category, config in self.FEED_SOURCES.items()
+        }
+    
+    def _collect_category(self, category: str, feeds: Dict[str, object]) -> None:
+        """Turn a category's fetched feed entries into trimmed article dicts"""
+        articles = []
+        seen_keys = set()
+        articles_per_source = self._per_source[category]
+        
+        for source in self.FEED_SOURCES[category]["sources"]:
+            try:
+                entries = feeds[source['url']]
+                if isinstance(entries, Exception):
+                    raise entries
+                
+                # Get articles from each source
+                for entry in entries[:articles_per_source]:
+                    # Extract and clean summary
+                    raw_summary = entry.get('summary', entry.get('description', ''))
                     
-                    if feed.bozo and not feed.entries:
-                        logger.warning(f"  Feed error for {source['name']}: {feed.bozo_exception}")
+                    article = Article(
+                        source=source['name'],
+                        title=entry.get('title', 'No title'),
+                        link=entry.get('link', '#'),
+                        published=entry.get('published', entry.get('updated', 'N/A')),
+                        summary=clean_summary(raw_summary),
+                    )
+                    
+                    # The same story syndicated to several of the category's
+                    # feeds is analyzed once; categories are collected
+                    # concurrently, so deduping across them would depend on timing.
+                    # Untitled entries are keyed by link alone, not by 'No title'.
+                    keys = story_keys(entry.get('title', ''), article.link)
+                    if not keys.isdisjoint(seen_keys):
+                        logger.debug("    Skipped duplicate: %s...", article.title[:40])
                         continue
                     
-                    # Get articles from each source
-                    for entry in feed.entries[:articles_per_source]:
-                        # Extract and clean summary
-                        raw_summary = entry.get('summary', entry.get('description', ''))
-                        clean_summary = re.sub(r'<[^>]+>', '', raw_summary)[:500]
-                        
-                        article = {
-                            "source": source['name'],
-                            "title": entry.get('title', 'No title'),
-                            "link": entry.get('link', '#'),
-                            "published": entry.get('published', entry.get('updated', 'N/A')),
-                            "summary": clean_summary,
-                        }
-                        self.news_data[category].append(article)
-                        logger.info(f"    Added: {article['title'][:40]}...")
-                
-                except Exception as e:
-                    logger.warning(f"  Error fetching {source['name']}: {str(e)}")
-                    continue
+                    articles.append(article)
+                    seen_keys |= keys
+                    logger.debug("    Added: %s...", article.title[:40])
             
-            # Trim to limit
-            if len(self.news_data[category]) > limit:
-                self.news_data[category] = self.news_data[category][:limit]
-            
-            logger.info(f"  {category}: {len(self.news_data[category])} articles collected")
+            except Exception as e:
+                logger.warning(f"  Error fetching {source['name']}: {str(e)}")
+                continue
+        
+        # Trim to limit
+        limit = self.FEED_SOURCES[category]["limit"]
+        self.news_data[category] = articles[:limit]
+        
+        logger.info(
+            f"  {category}: {len(self.news_data[category])} articles collected "
+            f"(target: {limit} articles, ~{articles_per_source} per source)"
+        )
+    
+    def fetch_feeds(self) -> None:
+        """Fetch and parse RSS feeds from all sources"""
+        logger.info("Starting RSS feed fetching...")
+        
+        # Download every feed in one concurrent batch
+        feeds = self._fetch_parsed({url: self._per_source[category] for category, _, url in self._flat_sources})
+        
+        for category in self.FEED_SOURCES:
+            self._collect_category(category, feeds)
         
         total = sum(len(v) for v in self.news_data.values())
         logger.info(f"RSS fetching completed. Total articles: {total}")
     
-    def generate_deep_analysis(self, title: str, summary: str, source: str) -> Optional[str]:
+    @retry(
+        wait=wait_exponential(min=1, max=8),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(_TRANSIENT_GEMINI_ERRORS),
+        reraise=True
+    )
+    async def _generate_once(self, prompt: str, on_first_chunk: Optional[Callable[[], None]] = None,
+                             **kwargs) -> str:
+        """Stream one Gemini response, backing off and retrying on transient errors
+        
+        The first chunk gets a generous timeout to cover the model's thinking
+        phase; after that the watchdog only measures silence between chunks,
+        so a long answer that keeps arriving is never cut off but a hung
+        stream fails fast.
+        """
+        response = await asyncio.wait_for(
+            self.model.generate_content_async(prompt, stream=True, **kwargs),
+            timeout=self.GEMINI_FIRST_CHUNK_TIMEOUT
+        )
+        if on_first_chunk:
+            on_first_chunk()
+        
+        chunks = []
+        stream = aiter(response)
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(stream), timeout=self.GEMINI_STALL_TIMEOUT)
+            except StopAsyncIteration:
+                break
+            if chunk.parts:
+                chunks.append(chunk.text)
+        return "".join(chunks)
+    
+    def _hedge_after(self, kind: str) -> float:
+        """Seconds a `kind` call may go without a first chunk before it is hedged"""
+        observed = self.first_chunk_latency[kind]
+        if not observed:
+            return self.HEDGE_AFTER[kind]
+        return max(self.HEDGE_AFTER[kind], self.HEDGE_LATENCY_FACTOR * statistics.median(observed))
+    
+    async def _generate(self, prompt: str, sem: asyncio.Semaphore, kind: str = "single", **kwargs) -> str:
+        """Call Gemini, hedging a straggler with a second identical request
+        
+        The hedge fires only if the first attempt has streamed nothing
+        _hedge_after(kind) seconds after taking its slot in `sem`, and it waits
+        for a slot of its own. Whichever attempt succeeds first wins and the
+        other is cancelled. Errors are only raised once every attempt has failed.
+        """
+        loop = asyncio.get_running_loop()
+        late = asyncio.Event()
+        
+        async def attempt(primary: bool) -> str:
+            async with sem:
+                if not primary:
+                    return await self._generate_once(prompt, **kwargs)
+                started = loop.time()
+                timer = loop.call_later(self._hedge_after(kind), late.set)
+                
+                def first_chunk() -> None:
+                    timer.cancel()
+                    latency = loop.time() - started
+                    self.first_chunk_latency[kind].append(latency)
+                    logger.debug("Gemini %s call: first chunk after %.1fs", kind, latency)
+                
+                try:
+                    return await self._generate_once(prompt, first_chunk, **kwargs)
+                finally:
+                    timer.cancel()
+        
+        tasks = [asyncio.create_task(attempt(primary=True))]
+        watcher = asyncio.create_task(late.wait())
+        try:
+            done, _ = await asyncio.wait([tasks[0], watcher], return_when=asyncio.FIRST_COMPLETED)
+            if tasks[0] not in done:
+                logger.debug("Gemini %s call is a straggler, hedging", kind)
+                tasks.append(asyncio.create_task(attempt(primary=False)))
+            
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    return done.pop().result()
+        finally:
+            watcher.cancel()
+            for task in tasks:
+                task.cancel()
+    
+    async def generate_deep_analysis(self, title: str, summary: str, source: str,
+                                     sem: asyncio.Semaphore) -> Optional[str]:
         """Generate AI-powered deep analysis using Google Gemini API"""
         try:
             prompt = self.ANALYST_PROMPT.format(
@@ -170,10 +1420,10 @@ class NewsAggregatorV3:
                 summary=summary
             )
             
-            response = self.model.generate_content(prompt)
+            text = await self._generate(prompt, sem)
             
-            if response.text:
-                return response.text.strip()
+            if text.strip():
+                return text.strip()
             else:
                 logger.warning(f"Empty response from Gemini for: {title}")
                 return None
@@ -182,47 +1432,167 @@ class NewsAggregatorV3:
             logger.error(f"Gemini API error for '{title}': {str(e)}")
             return None
     
+    async def generate_batch_analysis(self, articles: List[Article], sem: asyncio.Semaphore) -> Dict[int, str]:
+        """Generate deep analyses for several articles with a single Gemini call
+        
+        Returns a mapping of 1-based article index to analysis text. Articles
+        missing from the response are simply absent from the mapping.
+        """
+        try:
+            news_items = "\n\n".join(
+                self.BATCH_ITEM_TEMPLATE.format(
+                    idx=idx,
+                    source=article.source,
+                    title=article.title,
+                    summary=article.summary
+                )
+                for idx, article in enumerate(articles, 1)
+            )
+            prompt = self.BATCH_ANALYST_PROMPT.format(count=len(articles), news_items=news_items)
+            
+            text = await self._generate(
+                prompt,
+                sem,
+                kind="batch",
+                generation_config=self.BATCH_GENERATION_CONFIG
+            )
+            
+            return {
+                int(item["idx"]): item["analysis"].strip()
+                for item in orjson.loads(text)
+                if item.get("analysis")
+            }
+        
+        except Exception as e:
+            logger.error(f"Gemini batch error ({len(articles)} articles): {str(e)}")
+            return {}
+    
+    async def _analyze_category(self, category: str, articles: List[Article], sem: asyncio.Semaphore) -> None:
+        """Analyze one category's articles, retrying batch misses individually"""
+        # Reuse analyses from earlier runs; only the rest go to Gemini
+        analyses = {}
+        for idx, article in enumerate(articles, 1):
+            cached = self.summary_cache.get(article)
+            if cached:
+                analyses[idx] = cached
+        pending = [idx for idx in range(1, len(articles) + 1) if idx not in analyses]
+        
+        logger.info(f"Processing category: {category} ({len(articles)} articles, {len(pending)} uncached)")
+        
+        async def analyze_batch(chunk: List[int]) -> None:
+            batch = await self.generate_batch_analysis([articles[idx - 1] for idx in chunk], sem)
+            
+            # Batch results are numbered by position within the chunk
+            for pos, idx in enumerate(chunk, 1):
+                if pos in batch:
+                    analyses[idx] = batch[pos]
+        
+        await asyncio.gather(*(
+            analyze_batch(pending[start:start + self.BATCH_SIZE])
+            for start in range(0, len(pending), self.BATCH_SIZE)
+        ))
+        
+        async def analyze_one(idx: int, article: Article) -> None:
+            # Fall back to a dedicated call for anything the batch dropped
+            logger.debug("  [%d/%d] Re-analyzing: %s...", idx, len(articles), article.title[:40])
+            analyses[idx] = await self.generate_deep_analysis(
+                article.title,
+                article.summary,
+                article.source,
+                sem
+            )
+        
+        await asyncio.gather(*(
+            analyze_one(idx, articles[idx - 1])
+            for idx in pending
+            if idx not in analyses
+        ))
+        
+        for idx, article in enumerate(articles, 1):
+            analysis = analyses.get(idx)
+            if analysis and idx in pending:
+                self.summary_cache.put(article, analysis)
+            
+            article.deep_analysis = analysis or "深度分析生成失败，请稍后重试。"
+    
+    async def _process_all(self) -> None:
+        """Run every category's Gemini calls concurrently under a shared limit"""
+        sem = asyncio.Semaphore(self.GEMINI_CONCURRENCY)
+        await asyncio.gather(*(
+            self._analyze_category(category, articles, sem)
+            for category, articles in self.news_data.items()
+            if articles
+        ))
+    
     def process_articles(self) -> None:
-        """Process articles with deep AI analysis"""
+        """Process articles with deep AI analysis, categories in parallel"""
         logger.info("Processing articles with Gemini API deep analysis...")
         
-        for category, articles in self.news_data.items():
-            logger.info(f"Processing category: {category} ({len(articles)} articles)")
-            
-            for i, article in enumerate(articles):
-                logger.info(f"  [{i+1}/{len(articles)}] Analyzing: {article['title'][:40]}...")
-                
-                analysis = self.generate_deep_analysis(
-                    article['title'],
-                    article['summary'],
-                    article['source']
+        asyncio.run(self._process_all())
+        self.summary_cache.commit()
+        
+        logger.info("Article processing completed")
+    
+    async def _fetch_and_analyze(self) -> None:
+        """Fetch feeds and run Gemini analysis as one overlapped pipeline
+        
+        Each category is analyzed as soon as its own feeds are in, so Gemini
+        calls for fast categories run while slow feeds are still downloading.
+        """
+        logger.info("Starting pipelined RSS fetching and Gemini analysis...")
+        
+        # Pre-seed in config order so rendering order doesn't depend on timing
+        self.news_data = {category: [] for category in self.FEED_SOURCES}
+        sem = asyncio.Semaphore(self.GEMINI_CONCURRENCY)
+        
+        async with self._feed_session() as session:
+            async def category_pipeline(category: str) -> None:
+                urls = [source['url'] for source in self.FEED_SOURCES[category]["sources"]]
+                results = await asyncio.gather(
+                    *(self._fetch_feed(session, url, self._per_source[category]) for url in urls),
+                    return_exceptions=True
                 )
                 
-                article['deep_analysis'] = analysis or "深度分析生成失败，请稍后重试。"
+                self._collect_category(category, dict(zip(urls, results)))
+                if self.news_data[category]:
+                    await self._analyze_category(category, self.news_data[category], sem)
+            
+            await asyncio.gather(*(category_pipeline(category) for category in self.FEED_SOURCES))
         
-        logger.info("Article processing completed")
+        self._save_feed_cache()
+        self.summary_cache.commit()
+        
+        total = sum(len(v) for v in self.news_data.values())
+        logger.info(f"Fetching and analysis completed. Total articles: {total}")
     
     def scan_archives(self) -> List[Dict[str, str]]:
         """Scan archives folder and return list of historical files"""
-        archives = []
+        # The directory is read once per run; callers get their own copy
+        if self._archives is not None:
+            return list(self._archives)
+        
+        paths = {}
         
         if self.archives_dir.exists():
-            for file in sorted(self.archives_dir.glob("*.html"), reverse=True):
-                # Extract date from filename (e.g., 2025-01-01.html)
+            for file in self.archives_dir.iterdir():
+                # Extract date from filename (e.g., 2025-01-01.html / .json)
                 date_str = file.stem
-                try:
-                    # Validate date format
-                    datetime.strptime(date_str, "%Y-%m-%d")
-                    archives.append({
-                        "date": date_str,
-                        "path": f"archives/{file.name}",
-                        "display": date_str
-                    })
-                except ValueError:
+                if file.suffix not in (".html", ".json") or not _ARCHIVE_DATE_RE.fullmatch(date_str):
                     continue
+                # Link the static page where one exists, else the JSON viewer
+                if file.suffix == ".html":
+                    paths[date_str] = f"archives/{file.name}"
+                else:
+                    paths.setdefault(date_str, f"{self.VIEWER_FILE}?date={date_str}")
+        
+        archives = [
+            {"date": date_str, "path": paths[date_str], "display": date_str}
+            for date_str in sorted(paths, reverse=True)
+        ]
         
         logger.info(f"Found {len(archives)} historical archives")
-        return archives
+        self._archives = archives
+        return list(archives)
     
     def generate_html(self, output_file: str = "index.html", is_archive: bool = False) -> None:
         """Generate static HTML file with accordion UI and history navigation"""
@@ -231,17 +1601,19 @@ class NewsAggregatorV3:
         # Scan existing archives for navigation
         archives = self.scan_archives()
         
-        html_content = self._build_html(archives, is_archive)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        self._replace_file(Path(output_file), lambda out: self._build_html(out, archives, is_archive))
         
         logger.info(f"HTML file generated successfully: {output_file}")
     
     def generate_archive(self) -> None:
         """Generate archive file for today"""
+        json_file = self.archives_dir / f"{self.today}.json"
         archive_file = self.archives_dir / f"{self.today}.html"
-        logger.info(f"Generating archive file: {archive_file}")
+        logger.info(f"Generating archive files for {self.today}")
+        
+        # The article data alone; VIEWER_FILE renders it on demand
+        record = orjson.dumps(self._archive_record())
+        self._replace_file(json_file, lambda out: out.write(record.decode('utf-8')))
         
         # Scan existing archives (including today's if it exists)
         archives = self.scan_archives()
@@ -251,676 +1623,164 @@ class NewsAggregatorV3:
         if not any(a["date"] == self.today for a in archives):
             archives.insert(0, today_entry)
         
-        html_content = self._build_html(archives, is_archive=True)
-        
-        with open(archive_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        self._replace_file(self.VIEWER_FILE, lambda out: self._build_html(out, archives, sections=_VIEWER_SCRIPT))
+        if self.WRITE_HTML_ARCHIVES:
+            self._replace_file(archive_file, lambda out: self._build_html(out, archives, is_archive=True))
+        self._archives = None  # today's files now exist on disk
         
-        logger.info(f"Archive file generated successfully: {archive_file}")
+        logger.info(f"Archive files generated successfully: {json_file}")
     
-    def _build_html(self, archives: List[Dict], is_archive: bool = False) -> str:
-        """Build complete HTML content with accordion UI and history navigation"""
-        current_time = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
-        
-        # Category icons and colors
-        category_config = {
-            "中美政经": {"icon": "🇺🇸🇨🇳", "color": "#e74c3c", "subtitle": "China & US Policy"},
-            "越南市场": {"icon": "🇻🇳", "color": "#27ae60", "subtitle": "Vietnam Business · Deep Dive"},
-            "全球宏观": {"icon": "🌍", "color": "#3498db", "subtitle": "Global & EU/East Asia"},
-        }
-        
-        # Build history dropdown HTML
-        history_items = ""
-        for archive in archives[:30]:  # Limit to last 30 entries
-            # Adjust path for archive pages (they're in archives/ subfolder)
-            link_path = f"../{archive['path']}" if is_archive else archive['path']
-            if archive['date'] == self.today:
-                link_path = "../index.html" if is_archive else "index.html"
-                history_items += f'<a href="{link_path}" class="history-item current">{archive["display"]} (今日)</a>\n'
-            else:
-                history_items += f'<a href="{link_path}" class="history-item">{archive["display"]}</a>\n'
-        
-        # Home link for archive pages
-        home_link = "../index.html" if is_archive else "index.html"
-        
-        html = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>每日深度研报 | Daily Deep Analysis</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        :root {{
-            --bg-primary: #0a0a0f;
-            --bg-secondary: #12121a;
-            --bg-card: #1a1a24;
-            --bg-card-hover: #222230;
-            --text-primary: #f0f0f5;
-            --text-secondary: #a0a0b0;
-            --text-muted: #606070;
-            --border-color: #2a2a3a;
-            --accent-blue: #3498db;
-            --accent-red: #e74c3c;
-            --accent-green: #27ae60;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, "SF Pro Display", "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-            background: var(--bg-primary);
-            color: var(--text-primary);
-            line-height: 1.7;
-            min-height: 100vh;
-        }}
-        
-        /* Navigation Bar */
-        .navbar {{
-            position: sticky;
-            top: 0;
-            z-index: 1000;
-            background: rgba(10, 10, 15, 0.95);
-            backdrop-filter: blur(10px);
-            border-bottom: 1px solid var(--border-color);
-            padding: 12px 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-        
-        .navbar-brand {{
-            font-size: 1.2em;
-            font-weight: 600;
-            color: var(--text-primary);
-            text-decoration: none;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }}
-        
-        .navbar-brand:hover {{
-            color: var(--accent-blue);
-        }}
-        
-        /* History Dropdown */
-        .history-dropdown {{
-            position: relative;
-        }}
-        
-        .history-btn {{
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            color: var(--text-secondary);
-            padding: 8px 16px;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 0.9em;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            transition: all 0.2s;
-        }}
-        
-        .history-btn:hover {{
-            background: var(--bg-card-hover);
-            color: var(--text-primary);
-        }}
-        
-        .history-btn svg {{
-            width: 16px;
-            height: 16px;
-            fill: currentColor;
-            transition: transform 0.2s;
-        }}
-        
-        .history-dropdown.open .history-btn svg {{
-            transform: rotate(180deg);
-        }}
-        
-        .history-menu {{
-            position: absolute;
-            top: calc(100% + 8px);
-            right: 0;
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 12px;
-            min-width: 200px;
-            max-height: 400px;
-            overflow-y: auto;
-            display: none;
-            box-shadow: 0 10px 40px rgba(0, 0, 0, 0.5);
-        }}
-        
-        .history-dropdown.open .history-menu {{
-            display: block;
-        }}
-        
-        .history-menu-header {{
-            padding: 12px 16px;
-            border-bottom: 1px solid var(--border-color);
-            font-size: 0.8em;
-            color: var(--text-muted);
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        
-        .history-item {{
-            display: block;
-            padding: 10px 16px;
-            color: var(--text-secondary);
-            text-decoration: none;
-            font-size: 0.9em;
-            transition: all 0.2s;
-            border-bottom: 1px solid var(--border-color);
-        }}
-        
-        .history-item:last-child {{
-            border-bottom: none;
-        }}
-        
-        .history-item:hover {{
-            background: var(--bg-card-hover);
-            color: var(--text-primary);
-        }}
-        
-        .history-item.current {{
-            color: var(--accent-blue);
-            font-weight: 600;
-        }}
-        
-        .container {{
-            max-width: 900px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        
-        /* Header */
-        .header {{
-            text-align: center;
-            padding: 60px 20px;
-            background: linear-gradient(180deg, var(--bg-secondary) 0%, var(--bg-primary) 100%);
-            border-bottom: 1px solid var(--border-color);
-            margin-bottom: 40px;
-        }}
-        
-        .header h1 {{
-            font-size: 2.8em;
-            font-weight: 700;
-            margin-bottom: 12px;
-            background: linear-gradient(135deg, #fff 0%, #a0a0b0 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}
-        
-        .header .subtitle {{
-            font-size: 1.1em;
-            color: var(--text-secondary);
-            margin-bottom: 20px;
-        }}
-        
-        .header .timestamp {{
-            font-size: 0.9em;
-            color: var(--text-muted);
-            padding: 8px 16px;
-            background: var(--bg-card);
-            border-radius: 20px;
-            display: inline-block;
-        }}
-        
-        .header .vietnam-badge {{
-            display: inline-block;
-            margin-top: 15px;
-            padding: 6px 14px;
-            background: linear-gradient(135deg, var(--accent-green) 0%, #1e8449 100%);
-            color: white;
-            border-radius: 20px;
-            font-size: 0.85em;
-            font-weight: 600;
-        }}
-        
-        /* Category Section */
-        .category {{
-            margin-bottom: 50px;
-        }}
-        
-        .category-header {{
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            margin-bottom: 25px;
-            padding-bottom: 15px;
-            border-bottom: 2px solid var(--border-color);
-        }}
-        
-        .category-icon {{
-            font-size: 1.8em;
-        }}
-        
-        .category-title {{
-            font-size: 1.6em;
-            font-weight: 600;
-            color: var(--text-primary);
-        }}
-        
-        .category-subtitle {{
-            font-size: 0.9em;
-            color: var(--text-muted);
-            margin-left: auto;
-        }}
-        
-        .category-count {{
-            background: var(--accent-color);
-            color: white;
-            padding: 2px 10px;
-            border-radius: 12px;
-            font-size: 0.8em;
-            font-weight: 600;
-        }}
-        
-        /* Article Card - Accordion */
-        .article {{
-            background: var(--bg-card);
-            border: 1px solid var(--border-color);
-            border-radius: 12px;
-            margin-bottom: 16px;
-            overflow: hidden;
-            transition: all 0.3s ease;
-        }}
-        
-        .article:hover {{
-            background: var(--bg-card-hover);
-            border-color: #3a3a4a;
-        }}
-        
-        .article-header {{
-            padding: 20px 24px;
-            cursor: pointer;
-            display: flex;
-            align-items: flex-start;
-            gap: 16px;
-            user-select: none;
-        }}
-        
-        .article-header:hover {{
-            background: rgba(255, 255, 255, 0.02);
-        }}
-        
-        .article-indicator {{
-            width: 4px;
-            height: 4px;
-            background: var(--accent-color);
-            border-radius: 50%;
-            margin-top: 10px;
-            flex-shrink: 0;
-        }}
-        
-        .article-main {{
-            flex: 1;
-        }}
-        
-        .article-source {{
-            font-size: 0.75em;
-            color: var(--text-muted);
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-bottom: 8px;
-        }}
-        
-        .article-title {{
-            font-size: 1.15em;
-            font-weight: 600;
-            color: var(--text-primary);
-            line-height: 1.5;
-            margin-bottom: 8px;
-        }}
-        
-        .article-meta {{
-            font-size: 0.85em;
-            color: var(--text-muted);
-        }}
-        
-        .article-toggle {{
-            width: 32px;
-            height: 32px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            background: var(--bg-secondary);
-            border-radius: 8px;
-            flex-shrink: 0;
-            transition: transform 0.3s ease;
-        }}
-        
-        .article-toggle svg {{
-            width: 16px;
-            height: 16px;
-            fill: var(--text-muted);
-            transition: transform 0.3s ease;
-        }}
-        
-        .article.expanded .article-toggle svg {{
-            transform: rotate(180deg);
-        }}
-        
-        /* Article Content - Expandable */
-        .article-content {{
-            max-height: 0;
-            overflow: hidden;
-            transition: max-height 0.4s ease-out;
-        }}
-        
-        .article.expanded .article-content {{
-            max-height: 2000px;
-            transition: max-height 0.6s ease-in;
-        }}
-        
-        .article-body {{
-            padding: 0 24px 24px 44px;
-            border-top: 1px solid var(--border-color);
-        }}
-        
-        .analysis-section {{
-            padding-top: 20px;
-        }}
-        
-        .analysis-label {{
-            font-size: 0.8em;
-            color: var(--accent-color);
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-bottom: 12px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }}
-        
-        .analysis-label::before {{
-            content: "";
-            width: 20px;
-            height: 2px;
-            background: var(--accent-color);
-        }}
-        
-        .analysis-text {{
-            font-size: 1em;
-            color: var(--text-secondary);
-            line-height: 1.9;
-            white-space: pre-wrap;
-        }}
-        
-        .source-link {{
-            margin-top: 20px;
-            padding-top: 16px;
-            border-top: 1px dashed var(--border-color);
-        }}
-        
-        .source-link a {{
-            font-size: 0.8em;
-            color: var(--text-muted);
-            text-decoration: none;
-            display: inline-flex;
-            align-items: center;
-            gap: 6px;
-            transition: color 0.2s;
-        }}
-        
-        .source-link a:hover {{
-            color: var(--accent-blue);
-        }}
-        
-        .source-link a svg {{
-            width: 12px;
-            height: 12px;
-            fill: currentColor;
-        }}
-        
-        /* Footer */
-        .footer {{
-            text-align: center;
-            padding: 40px 20px;
-            border-top: 1px solid var(--border-color);
-            margin-top: 60px;
-        }}
-        
-        .footer p {{
-            font-size: 0.85em;
-            color: var(--text-muted);
-            margin-bottom: 8px;
-        }}
-        
-        .footer .powered {{
-            font-size: 0.75em;
-            color: var(--text-muted);
-            opacity: 0.7;
-        }}
-        
-        /* Responsive */
-        @media (max-width: 768px) {{
-            .navbar {{
-                padding: 10px 15px;
-            }}
-            
-            .navbar-brand {{
-                font-size: 1em;
-            }}
-            
-            .container {{
-                padding: 15px;
-            }}
-            
-            .header {{
-                padding: 40px 15px;
-            }}
-            
-            .header h1 {{
-                font-size: 2em;
-            }}
-            
-            .category-header {{
-                flex-wrap: wrap;
-            }}
-            
-            .category-subtitle {{
-                width: 100%;
-                margin-left: 0;
-                margin-top: 8px;
-            }}
-            
-            .article-header {{
-                padding: 16px;
-            }}
-            
-            .article-body {{
-                padding: 0 16px 20px 16px;
-            }}
-            
-            .article-title {{
-                font-size: 1.05em;
-            }}
+    def _archive_record(self) -> Dict:
+        """Today's articles as plain data, field names matching the HTML fragments"""
+        categories = []
+        for category, articles in self.news_data.items():
+            if not articles:
+                continue
             
-            .history-menu {{
-                right: -10px;
-                min-width: 180px;
-            }}
-        }}
-        
-        /* Category-specific accent colors */
-        .category-china-us {{ --accent-color: #e74c3c; }}
-        .category-vietnam {{ --accent-color: #27ae60; }}
-        .category-global {{ --accent-color: #3498db; }}
-        
-        /* Scrollbar styling */
-        .history-menu::-webkit-scrollbar {{
-            width: 6px;
-        }}
-        
-        .history-menu::-webkit-scrollbar-track {{
-            background: var(--bg-secondary);
-        }}
-        
-        .history-menu::-webkit-scrollbar-thumb {{
-            background: var(--border-color);
-            border-radius: 3px;
-        }}
-    </style>
-</head>
-<body>
-    <!-- Navigation Bar with History Dropdown -->
-    <nav class="navbar">
-        <a href="{home_link}" class="navbar-brand">
-            📊 每日深度研报
-        </a>
-        <div class="history-dropdown" id="historyDropdown">
-            <button class="history-btn" onclick="toggleHistory()">
-                📅 往期回顾
-                <svg viewBox="0 0 24 24"><path d="M7.41 8.59L12 13.17l4.59-4.58L18 10l-6 6-6-6 1.41-1.41z"/></svg>
-            </button>
-            <div class="history-menu">
-                <div class="history-menu-header">Historical Archives</div>
-                {history_items}
-            </div>
-        </div>
-    </nav>
+            config = self.CATEGORY_CONFIG[category]
+            categories.append({
+                "category": category,
+                "cat_class": config['css_class'],
+                "icon": config['icon'],
+                "subtitle": config['subtitle'],
+                "count": len(articles),
+                "articles": [
+                    {
+                        "article_id": f"{category}-{idx}".replace(" ", "-"),
+                        "source": article.source,
+                        "title": article.title,
+                        "published": article.published,
+                        "analysis": article.deep_analysis,
+                        "link": article.link,
+                    }
+                    for idx, article in enumerate(articles)
+                ],
+            })
+        
+        return {"date": self.today, "generated_at": self._generated_at, "categories": categories}
     
-    <header class="header">
-        <h1>📊 每日深度研报</h1>
-        <p class="subtitle">AI-Powered Macro Analysis · 首席分析师视角</p>
-        <span class="timestamp">🕐 更新时间: {current_time}</span>
-        <div><span class="vietnam-badge">🇻🇳 越南深度版 V3.0</span></div>
-    </header>
+    def _replace_file(self, path: Path, write: Callable[[TextIO], None]) -> None:
+        """Stream content into a temp file beside `path`, then swap it in atomically"""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with open(fd, 'w', encoding='utf-8', buffering=1 << 20) as out:
+                write(out)
+            os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
     
-    <main class="container">
-"""
-        
-        # Generate category sections
-        category_classes = {
-            "中美政经": "category-china-us",
-            "越南市场": "category-vietnam",
-            "全球宏观": "category-global",
-        }
-        
+    @cached_property
+    def _stylesheet(self) -> str:
+        """Minified page stylesheet"""
+        return minify_css(_CSS)
+    
+    @cached_property
+    def _stylesheet_version(self) -> str:
+        """Cache-busting hash of the stylesheet, appended to its URL"""
+        return hashlib.sha1(self._stylesheet.encode('utf-8')).hexdigest()[:8]
+    
+    def _write_stylesheet(self) -> None:
+        """Write the stylesheet if its content changed"""
+        path = self.STYLESHEET_FILE
+        if path.exists() and path.read_text(encoding='utf-8') == self._stylesheet:
+            return
+        self._replace_file(path, lambda out: out.write(self._stylesheet))
+        logger.info(f"Stylesheet written: {path}")
+    
+    def _build_article_html(self, category: str, idx: int, article: Article) -> str:
+        """Build the accordion card for a single article"""
+        return _ARTICLE_HTML.format(
+            article_id=f"{category}-{idx}".replace(" ", "-"),
+            source=escape(article.source),
+            title=escape(article.title),
+            published=escape(article.published),
+            analysis=escape(article.deep_analysis, quote=False),
+            link=escape(article.link)
+        )
+    
+    @cached_property
+    def _sections_html(self) -> str:
+        """Category sections, rendered once and shared by the index and archive pages"""
+        parts = []
         for category, articles in self.news_data.items():
             if not articles:
                 continue
             
-            config = category_config.get(category, {"icon": "📰", "color": "#666", "subtitle": ""})
-            cat_class = category_classes.get(category, "")
+            config = self.CATEGORY_CONFIG[category]
             
-            html += f"""
-        <section class="category {cat_class}">
-            <div class="category-header">
-                <span class="category-icon">{config['icon']}</span>
-                <h2 class="category-title">{category}</h2>
-                <span class="category-count">{len(articles)} 篇</span>
-                <span class="category-subtitle">{config['subtitle']}</span>
-            </div>
-"""
+            parts.append(_CATEGORY_OPEN_HTML.format(
+                cat_class=config['css_class'],
+                icon=config['icon'],
+                category=category,
+                count=len(articles),
+                subtitle=config['subtitle']
+            ))
             
             for idx, article in enumerate(articles):
-                article_id = f"{category}-{idx}".replace(" ", "-")
-                title_escaped = article['title'].replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
-                analysis_escaped = article.get('deep_analysis', '').replace('<', '&lt;').replace('>', '&gt;')
-                
-                html += f"""
-            <article class="article" data-id="{article_id}">
-                <div class="article-header" onclick="toggleArticle(this)">
-                    <div class="article-indicator"></div>
-                    <div class="article-main">
-                        <div class="article-source">{article['source']}</div>
-                        <h3 class="article-title">{title_escaped}</h3>
-                        <div class="article-meta">{article['published']}</div>
-                    </div>
-                    <div class="article-toggle">
-                        <svg viewBox="0 0 24 24"><path d="M7.41 8.59L12 13.17l4.59-4.58L18 10l-6 6-6-6 1.41-1.41z"/></svg>
-                    </div>
-                </div>
-                <div class="article-content">
-                    <div class="article-body">
-                        <div class="analysis-section">
-                            <div class="analysis-label">深度分析 Deep Analysis</div>
-                            <div class="analysis-text">{analysis_escaped}</div>
-                        </div>
-                        <div class="source-link">
-                            <a href="{article['link']}" target="_blank" rel="noopener noreferrer">
-                                <svg viewBox="0 0 24 24"><path d="M19 19H5V5h7V3H5c-1.11 0-2 .9-2 2v14c0 1.1.89 2 2 2h14c1.1 0 2-.9 2-2v-7h-2v7zM14 3v2h3.59l-9.83 9.83 1.41 1.41L19 6.41V10h2V3h-7z"/></svg>
-                                Source Link · 原文链接
-                            </a>
-                        </div>
-                    </div>
-                </div>
-            </article>
-"""
+                parts.append(self._build_article_html(category, idx, article))
             
-            html += """
-        </section>
-"""
+            parts.append(_CATEGORY_CLOSE_HTML)
         
-        html += """
-    </main>
+        return "".join(parts)
     
-    <footer class="footer">
-        <p>🤖 由 Google Gemini AI 深度分析驱动</p>
-        <p class="powered">Automated by GitHub Actions · Hosted on GitHub Pages</p>
-        <p class="powered">V3.0 Historical Archives Edition</p>
-    </footer>
+    @cached_property
+    def _generated_at(self) -> str:
+        """Timestamp shown on every page written this run"""
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
     
-    <script>
-        function toggleArticle(header) {
-            const article = header.closest('.article');
-            const wasExpanded = article.classList.contains('expanded');
-            
-            article.classList.toggle('expanded');
-            
-            if (!wasExpanded) {
-                setTimeout(() => {
-                    article.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
-                }, 100);
-            }
-        }
+    def _build_html(self, out: TextIO, archives: List[Dict], is_archive: bool = False,
+                    sections: Optional[str] = None) -> None:
+        """Write complete HTML content with accordion UI and history navigation to `out`
         
-        function toggleHistory() {
-            const dropdown = document.getElementById('historyDropdown');
-            dropdown.classList.toggle('open');
-        }
-        
-        // Close dropdown when clicking outside
-        document.addEventListener('click', (e) => {
-            const dropdown = document.getElementById('historyDropdown');
-            if (!dropdown.contains(e.target)) {
-                dropdown.classList.remove('open');
-            }
-        });
-        
-        // Keyboard navigation
-        document.addEventListener('keydown', (e) => {
-            if (e.key === 'Escape') {
-                document.querySelectorAll('.article.expanded').forEach(a => {
-                    a.classList.remove('expanded');
-                });
-                document.getElementById('historyDropdown').classList.remove('open');
-            }
-        });
-    </script>
-</body>
-</html>"""
+        `sections` replaces today's rendered categories, e.g. with the archive viewer.
+        """
+        # Only the head differs per page: archive pages sit one directory down
+        prefix = "../" if is_archive else ""
         
-        return html
+        # Build history dropdown HTML
+        history_items = "".join(
+            (_HISTORY_TODAY_HTML if archive['date'] == self.today else _HISTORY_ITEM_HTML).format(
+                prefix=prefix, **archive
+            )
+            for archive in archives[:30]  # Limit to last 30 entries
+        )
+        
+        out.write(_HTML_HEAD.format(
+            stylesheet=f"{prefix}{self.STYLESHEET_FILE}?v={self._stylesheet_version}",
+            home_link=f"{prefix}index.html",
+            history_items=history_items,
+            current_time=self._generated_at
+        ))
+        out.write(self._sections_html if sections is None else sections)
+        out.write(_HTML_TAIL)
     
     def run(self, output_file: str = "index.html") -> None:
         """Execute the complete news aggregation pipeline"""
         try:
-            logger.info("=" * 70)
-            logger.info("Starting Daily News Aggregation Pipeline V3.0")
-            logger.info("Historical Archives Edition with Deep Vietnam Coverage")
-            logger.info("=" * 70)
+            logger.info(
+                "\n%s\nStarting Daily News Aggregation Pipeline V3.0"
+                "\nHistorical Archives Edition with Deep Vietnam Coverage\n%s",
+                _BANNER, _BANNER
+            )
+            
+            if aiohttp is not None:
+                asyncio.run(self._fetch_and_analyze())
+            else:
+                self.fetch_feeds()
+                self.process_articles()
             
-            self.fetch_feeds()
-            self.process_articles()
+            # First-chunk latency is what the hedge floors should be tuned against
+            for kind, latencies in self.first_chunk_latency.items():
+                if latencies:
+                    logger.info(
+                        f"Gemini {kind} calls: first chunk median "
+                        f"{statistics.median(latencies):.1f}s, max {max(latencies):.1f}s"
+                    )
+            
+            # Shared stylesheet, linked by every page below
+            self._write_stylesheet()
             
             # Generate main index.html
             self.generate_html(output_file, is_archive=False)
@@ -928,11 +1788,10 @@ class NewsAggregatorV3:
             # Generate archive file for today
             self.generate_archive()
             
-            logger.info("=" * 70)
-            logger.info("Pipeline V3.0 completed successfully!")
-            logger.info(f"Generated: {output_file}")
-            logger.info(f"Archived: archives/{self.today}.html")
-            logger.info("=" * 70)
+            logger.info(
+                "\n%s\nPipeline V3.0 completed successfully!\nGenerated: %s\nArchived: %s\n%s",
+                _BANNER, output_file, self.archives_dir / f"{self.today}.json", _BANNER
+            )
             
         except Exception as e:
             logger.error(f"Pipeline failed: {str(e)}", exc_info=True)
@@ -942,13 +1801,13 @@ class NewsAggregatorV3:
 def main():
     """Main entry point"""
     try:
+        # The constructor validates configuration before building anything
         aggregator = NewsAggregatorV3()
         aggregator.run()
-    except ValueError as e:
-        logger.error(f"Configuration error: {str(e)}")
-        sys.exit(1)
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        # Configuration errors are self-explanatory; anything else gets a traceback
+        is_config = isinstance(e, ValueError)
+        logger.error(f"{'Configuration' if is_config else 'Unexpected'} error: {str(e)}", exc_info=not is_config)
         sys.exit(1)
 
 
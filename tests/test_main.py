@@ -0,0 +1,41 @@
+"""Tests for the feed-cleanup and dedupe helpers in main.py
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import unittest
+
+from main import clean_summary, story_keys
+
+
+class CleanSummaryTest(unittest.TestCase):
+    def test_strips_wordpress_footer_after_post_prefixed_prose(self):
+        raw = (
+            "Investors cheered the post-election rally on Monday. "
+            "The post Vietnam stocks climb appeared first on The Saigon Times."
+        )
+        self.assertEqual(clean_summary(raw), "Investors cheered the post-election rally on Monday.")
+
+    def test_keeps_summary_opening_with_the_post(self):
+        raw = (
+            "The post office will close early on Friday. "
+            "The post Holiday hours appeared first on The Saigon Times."
+        )
+        self.assertEqual(clean_summary(raw), "The post office will close early on Friday.")
+
+
+class StoryKeysTest(unittest.TestCase):
+    def test_query_distinct_links_are_different_stories(self):
+        first = story_keys("", "https://example.com/article.php?id=1")
+        second = story_keys("", "https://example.com/article.php?id=2")
+        self.assertTrue(first.isdisjoint(second))
+
+    def test_tracking_parameters_are_ignored(self):
+        self.assertEqual(
+            story_keys("", "https://example.com/news/story?utm_source=rss&utm_medium=feed"),
+            story_keys("", "https://example.com/news/story/"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()